@@ -64,7 +64,7 @@ from .resources.repositories import RepositoriesResource, RepositoryResource
 from .resources.search import SearchResource
 from .resources.sources import SourceResource, SourcesResource
 from .resources.tags import TagResource, TagsResource
-from .resources.tasks import TaskResource
+from .resources.tasks import TaskResource, TasksResource
 from .resources.timeline import (
     FamilyTimelineResource,
     PersonTimelineResource,
@@ -282,6 +282,11 @@ register_endpt(
 )
 
 # Tasks
+register_endpt(
+    TasksResource,
+    "/tasks/",
+    "tasks",
+)
 register_endpt(
     TaskResource,
     "/tasks/<string:task_id>",
@@ -19,16 +19,73 @@
 
 """API resource endpoints."""
 
+import hashlib
+import time
 from functools import wraps
-from typing import Iterable
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional
 
+from cachetools import TTLCache
 from flask import abort, current_app
-from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask_jwt_extended import JWTManager, get_jwt, verify_jwt_in_request
 from flask_jwt_extended.exceptions import NoAuthorizationError
 
 from ..auth.const import CLAIM_LIMITED_SCOPE
 
 
+class CachingJWTManager(JWTManager):
+    """JWT manager caching the claims of successfully decoded tokens.
+
+    Verifying the signature of a token is by far the most expensive part of
+    authenticating a request. Since clients send the same token with many
+    requests, the decoded claims are kept in a short-lived cache keyed by
+    the SHA-256 hash of the raw token. Failed validations are never cached
+    and the expiration time is checked again on every cache hit.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the JWT manager."""
+        self._decode_cache: Optional[TTLCache] = None
+        self._decode_cache_lock = Lock()
+        super().__init__(app, **kwargs)
+
+    def _get_decode_cache(self) -> Optional[TTLCache]:
+        """Get the decode cache, creating it on first use."""
+        if self._decode_cache is None:
+            maxsize = current_app.config.get("JWT_DECODE_CACHE_SIZE")
+            ttl = current_app.config.get("JWT_DECODE_CACHE_TTL")
+            if not maxsize or not ttl:
+                return None
+            with self._decode_cache_lock:
+                if self._decode_cache is None:
+                    self._decode_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        return self._decode_cache
+
+    def _decode_jwt_from_config(
+        self, encoded_token: str, csrf_value=None, allow_expired: bool = False
+    ) -> Dict[str, Any]:
+        """Decode a token, using cached claims if available."""
+        cache = self._get_decode_cache()
+        if cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(
+                encoded_token, csrf_value=csrf_value, allow_expired=allow_expired
+            )
+        key = hashlib.sha256(encoded_token.encode()).hexdigest()
+        with self._decode_cache_lock:
+            cached = cache.get(key)
+        if cached is not None:
+            claims, exp = cached
+            if exp is None or exp > time.time():
+                return claims
+            with self._decode_cache_lock:
+                cache.pop(key, None)
+        # raises on invalid or expired tokens, which are thus never cached
+        claims = super()._decode_jwt_from_config(encoded_token)
+        with self._decode_cache_lock:
+            cache[key] = (claims, claims.get("exp"))
+        return claims
+
+
 def jwt_required_ifauth(func):
     """Check JWT unless authentication is disabled.
 
@@ -19,20 +19,176 @@
 
 """Background task resources."""
 
+import uuid
 from http import HTTPStatus
+from threading import Lock
+from typing import Any, Dict, List, Optional
 
-from celery.result import AsyncResult
-from flask import abort
+from cachetools import TLRUCache
+from celery import Celery, states
+from celery.backends.base import BaseKeyValueStoreBackend
+from flask import abort, current_app
+from webargs import ValidationError, fields, validate
 
+from ..util import use_args
 from . import ProtectedResource
 
+# task states that will not change anymore can be cached much longer
+TASK_META_TTL_READY = 60
+TASK_META_TTL_UNREADY = 0.5
+
+# maximum number of task IDs in a single batch request
+TASKS_MAX_IDS = 100
+
+
+def _task_meta_ttu(_key: str, meta: Dict[str, Any], now: float) -> float:
+    """Return the expiration time of a cached task meta."""
+    if meta["status"] in states.READY_STATES:
+        return now + TASK_META_TTL_READY
+    return now + TASK_META_TTL_UNREADY
+
+
+_task_meta_cache = TLRUCache(maxsize=1024, ttu=_task_meta_ttu)
+_task_meta_cache_lock = Lock()
+
+
+def is_task_id(task_id: str) -> bool:
+    """Check whether a string is a syntactically valid task ID.
+
+    Only the canonical UUID form used by Celery is accepted.
+    """
+    try:
+        return str(uuid.UUID(task_id)) == task_id
+    except ValueError:
+        return False
+
+
+def validate_task_id(task_id: str) -> None:
+    """Raise a validation error if a string is not a valid task ID."""
+    if not is_task_id(task_id):
+        raise ValidationError("Invalid task ID.")
+
+
+def get_celery_app() -> Celery:
+    """Get the Celery app configured for the current Flask app."""
+    return current_app.extensions["celery"]
+
+
+def _fetch_task_metas(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch the meta data of several tasks from the result backend.
+
+    Key-value store backends supporting it (e.g. Redis) are queried with a
+    single MGET, other backends with one call per task.
+    """
+    celery_app = get_celery_app()
+    backend = celery_app.backend
+    if (
+        not isinstance(backend, BaseKeyValueStoreBackend)
+        or type(backend).mget is BaseKeyValueStoreBackend.mget
+    ):
+        return {
+            task_id: celery_app.AsyncResult(task_id)._get_task_meta()
+            for task_id in task_ids
+        }
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    values = backend.mget(keys)
+    if hasattr(values, "items"):
+        # some backends (e.g. cache) return a mapping of the keys found
+        values = [values.get(key) for key in keys]
+    metas = {}
+    for task_id, value in zip(task_ids, values):
+        if value is None:
+            metas[task_id] = {"status": states.PENDING, "result": None}
+        else:
+            metas[task_id] = backend.decode_result(value)
+    return metas
+
+
+def get_task_metas(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get the meta data of several tasks, using a short-lived cache."""
+    metas = {}
+    with _task_meta_cache_lock:
+        for task_id in task_ids:
+            meta = _task_meta_cache.get(task_id)
+            if meta is not None:
+                metas[task_id] = meta
+    missing = [task_id for task_id in task_ids if task_id not in metas]
+    if missing:
+        fetched = _fetch_task_metas(missing)
+        with _task_meta_cache_lock:
+            for task_id, meta in fetched.items():
+                _task_meta_cache[task_id] = meta
+        metas.update(fetched)
+    return metas
+
+
+def get_task_meta(task_id: str) -> Dict[str, Any]:
+    """Get the meta data of a task, using a short-lived cache."""
+    return get_task_metas([task_id])[task_id]
+
+
+def serialize_task_info(state: str, result: Any) -> Optional[Any]:
+    """Serialize the info of a task to a JSON compatible object."""
+    if isinstance(result, BaseException):
+        return {"exc_type": type(result).__name__, "exc_message": str(result)}
+    if state in states.READY_STATES or state == "PROGRESS":
+        return result
+    return None
+
+
+def serialize_task_meta(meta: Dict[str, Any], info: bool = True) -> Dict[str, Any]:
+    """Serialize the meta data of a task."""
+    state = meta["status"]
+    payload = {"state": state}
+    if info:
+        payload["info"] = serialize_task_info(state, meta["result"])
+    return payload
+
+
+TASK_FIELDS_ARG = fields.DelimitedList(
+    fields.Str(validate=validate.Length(min=1)),
+    validate=validate.ContainsOnly(choices=["state", "info"]),
+    load_default=["state", "info"],
+)
+
 
 class TaskResource(ProtectedResource):
     """Resource for a single task."""
 
-    def get(self, task_id: str):
+    @use_args(
+        {
+            "fields": TASK_FIELDS_ARG,
+        },
+        location="query",
+    )
+    def get(self, args: Dict, task_id: str):
         """Get info about a task."""
-        task = AsyncResult(task_id)
-        if task is None:
+        if not is_task_id(task_id):
             abort(HTTPStatus.NOT_FOUND)
-        return {"state": task.state, "info": str(task.info)}
+        meta = get_task_meta(task_id)
+        return serialize_task_meta(meta, info="info" in args["fields"])
+
+
+class TasksResource(ProtectedResource):
+    """Resource for several tasks."""
+
+    @use_args(
+        {
+            "fields": TASK_FIELDS_ARG,
+            "ids": fields.DelimitedList(
+                fields.Str(validate=validate_task_id),
+                required=True,
+                validate=validate.Length(min=1, max=TASKS_MAX_IDS),
+            ),
+        },
+        location="query",
+    )
+    def get(self, args: Dict):
+        """Get info about several tasks."""
+        task_ids = list(dict.fromkeys(args["ids"]))
+        metas = get_task_metas(task_ids)
+        info = "info" in args["fields"]
+        return {
+            task_id: serialize_task_meta(metas[task_id], info=info)
+            for task_id in task_ids
+        }
@@ -26,9 +26,9 @@ from typing import Any, Dict, Optional
 from flask import Flask, abort, g, send_from_directory
 from flask_compress import Compress
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 
 from .api import api_blueprint
+from .api.auth import CachingJWTManager
 from .api.cache import thumbnail_cache
 from .api.ratelimiter import limiter
 from .api.search import SearchIndexer
@@ -80,7 +80,7 @@ def create_app(
         app.config.from_object(DefaultConfigJWT)
 
         # instantiate JWT manager
-        JWTManager(app)
+        CachingJWTManager(app)
 
         # instantiate and store auth provider
         # if DB URI is missing, try to get it from the env or fail
@@ -76,6 +76,25 @@ class SQLAuth:
             raise ValueError("Username must not be empty")
         if password == "":
             raise ValueError("Password must not be empty")
+        self.add_user_with_hash(
+            name=name,
+            pwhash=hash_password(password),
+            fullname=fullname,
+            email=email,
+            role=role,
+        )
+
+    def add_user_with_hash(
+        self,
+        name: str,
+        pwhash: str,
+        fullname: str = None,
+        email: str = None,
+        role: int = None,
+    ):
+        """Add a user with an already hashed password."""
+        if name == "":
+            raise ValueError("Username must not be empty")
         try:
             with self.session_scope() as session:
                 user = User(
@@ -83,7 +102,7 @@ class SQLAuth:
                     name=name,
                     fullname=fullname,
                     email=email,
-                    pwhash=hash_password(password),
+                    pwhash=pwhash,
                     role=role,
                 )
                 session.add(user)
@@ -54,3 +54,5 @@ class DefaultConfigJWT(object):
     JWT_TOKEN_LOCATION = ["headers", "query_string"]
     JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(minutes=15)
     JWT_REFRESH_TOKEN_EXPIRES = False
+    JWT_DECODE_CACHE_SIZE = 4096
+    JWT_DECODE_CACHE_TTL = 15
@@ -6,7 +6,8 @@ from celery import current_app as current_celery_app
 
 def create_celery(app):
     """App factory for celery."""
-    celery = current_celery_app
+    # resolve the proxy once so the Flask app holds the actual Celery app
+    celery = current_celery_app._get_current_object()
     celery.conf.name = app.import_name
     celery.conf.update(app.config["CELERY_CONFIG"])
 
@@ -20,4 +21,5 @@ def create_celery(app):
                 return self.run(*args, **kwargs)
 
     celery.Task = ContextTask
+    app.extensions["celery"] = celery
     return celery
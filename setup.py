@@ -32,6 +32,7 @@ REQUIREMENTS = [
     "Click>=7.0",
     "Flask>=2.0.0",
     "Flask-Caching>=2.0.0",
+    "cachetools>=5.0.0",
     "Flask-Compress",
     "Flask-Cors",
     "Flask-JWT-Extended>=4.2.1, !=4.4.0, !=4.4.1",
@@ -20,16 +20,22 @@
 """Tests for the /api/tasks endpoint."""
 
 import unittest
+import uuid
 from unittest.mock import patch
 
 import pytest
+from cachetools import TLRUCache
 from gramps.cli.clidbman import CLIDbManager
 from gramps.gen.dbstate import DbState
 
+from gramps_webapi.api.resources import tasks
 from gramps_webapi.app import create_app
 from gramps_webapi.auth.const import ROLE_GUEST, ROLE_OWNER
 from gramps_webapi.const import ENV_CONFIG_FILE, TEST_AUTH_CONFIG
 
+TASK_ID = "0f8d3ac0-3b7c-4a8e-9d2e-5b6a7c8d9e0f"
+TASK_ID_2 = "6c1b2a3d-4e5f-4a7b-8c9d-0e1f2a3b4c5d"
+
 
 @pytest.mark.usefixtures("celery_session_app")
 @pytest.mark.usefixtures("celery_session_worker")
@@ -54,6 +60,10 @@ class TestTask(unittest.TestCase):
         sqlauth = cls.app.config["AUTH_PROVIDER"]
         sqlauth.create_table()
         sqlauth.add_user(name="user", password="123", role=ROLE_GUEST)
+        rv = cls.client.post(
+            "/api/token/", json={"username": "user", "password": "123"}
+        )
+        cls.auth_user = {"Authorization": "Bearer {}".format(rv.json["access_token"])}
 
     @classmethod
     def tearDownClass(cls):
@@ -63,14 +73,147 @@ class TestTask(unittest.TestCase):
         rv = self.client.get("/api/tasks/nope")
         assert rv.status_code == 401
 
+    def test_task_invalid(self):
+        rv = self.client.get("/api/tasks/nope", headers=self.auth_user)
+        assert rv.status_code == 404
+        # only the canonical UUID form is a valid task ID
+        for task_id in [
+            TASK_ID.upper(),
+            TASK_ID.replace("-", ""),
+            "{" + TASK_ID + "}",
+            "urn:uuid:" + TASK_ID,
+        ]:
+            rv = self.client.get(f"/api/tasks/{task_id}", headers=self.auth_user)
+            assert rv.status_code == 404
+            rv = self.client.get(f"/api/tasks/?ids={task_id}", headers=self.auth_user)
+            assert rv.status_code == 422
+
     def test_task_nonexistant(self):
-        rv = self.client.post(
-            "/api/token/", json={"username": "user", "password": "123"}
+        rv = self.client.get(f"/api/tasks/{TASK_ID}", headers=self.auth_user)
+        assert rv.status_code == 200
+        assert rv.json["state"] == "PENDING"
+
+    def test_task_state_only(self):
+        rv = self.client.get(
+            f"/api/tasks/{TASK_ID}?fields=state", headers=self.auth_user
         )
-        token = rv.json["access_token"]
+        assert rv.status_code == 200
+        assert rv.json == {"state": "PENDING"}
+        rv = self.client.get(f"/api/tasks/{TASK_ID}?fields=foo", headers=self.auth_user)
+        assert rv.status_code == 422
+
+    def test_tasks_multiple(self):
+        rv = self.client.get(f"/api/tasks/?ids={TASK_ID}")
+        assert rv.status_code == 401
+        rv = self.client.get("/api/tasks/", headers=self.auth_user)
+        # no ids
+        assert rv.status_code == 422
+        rv = self.client.get(f"/api/tasks/?ids={TASK_ID},nope", headers=self.auth_user)
+        # invalid id
+        assert rv.status_code == 422
         rv = self.client.get(
-            "/api/tasks/nope",
-            headers={"Authorization": "Bearer {}".format(token)},
+            f"/api/tasks/?ids={TASK_ID},{TASK_ID_2}", headers=self.auth_user
         )
         assert rv.status_code == 200
-        assert rv.json["state"] == "PENDING"
+        assert set(rv.json) == {TASK_ID, TASK_ID_2}
+        assert rv.json[TASK_ID]["state"] == "PENDING"
+        assert rv.json[TASK_ID_2]["state"] == "PENDING"
+
+    def test_tasks_multiple_mget(self):
+        task_ids = [str(uuid.uuid4()) for _ in range(3)]
+        backend = self.app.extensions["celery"].backend
+        with patch.object(
+            backend, "mget", return_value=[None] * len(task_ids)
+        ) as mock_mget:
+            rv = self.client.get(
+                "/api/tasks/?ids={}".format(",".join(task_ids)), headers=self.auth_user
+            )
+        assert rv.status_code == 200
+        mock_mget.assert_called_once()
+        assert len(mock_mget.call_args[0][0]) == len(task_ids)
+        assert all(rv.json[task_id]["state"] == "PENDING" for task_id in task_ids)
+
+    def test_tasks_multiple_mget_mapping(self):
+        task_ids = [str(uuid.uuid4()) for _ in range(2)]
+        backend = self.app.extensions["celery"].backend
+        key = backend.get_key_for_task(task_ids[0])
+        value = backend.encode({"status": "SUCCESS", "result": 42})
+        # cache backends return a mapping containing only the keys found
+        with patch.object(backend, "mget", return_value={key: value}) as mock_mget:
+            rv = self.client.get(
+                "/api/tasks/?ids={}".format(",".join(task_ids)), headers=self.auth_user
+            )
+        assert rv.status_code == 200
+        mock_mget.assert_called_once()
+        assert rv.json[task_ids[0]] == {"state": "SUCCESS", "info": 42}
+        assert rv.json[task_ids[1]]["state"] == "PENDING"
+
+    def test_tasks_too_many(self):
+        task_ids = [str(uuid.uuid4()) for _ in range(tasks.TASKS_MAX_IDS + 1)]
+        rv = self.client.get(
+            "/api/tasks/?ids={}".format(",".join(task_ids)), headers=self.auth_user
+        )
+        assert rv.status_code == 422
+
+    def test_task_results(self):
+        celery_app = self.app.extensions["celery"]
+
+        @celery_app.task
+        def succeed():
+            return {"answer": 42}
+
+        @celery_app.task
+        def fail():
+            raise ValueError("boom")
+
+        # store the results of eagerly executed tasks in the result backend
+        celery_app.conf.task_store_eager_result = True
+        try:
+            task_success = succeed.apply()
+            task_failure = fail.apply()
+        finally:
+            celery_app.conf.task_store_eager_result = False
+        task_id_revoked = str(uuid.uuid4())
+        celery_app.backend.mark_as_revoked(task_id_revoked, reason="revoked")
+        rv = self.client.get(f"/api/tasks/{task_success.id}", headers=self.auth_user)
+        assert rv.status_code == 200
+        assert rv.json == {"state": "SUCCESS", "info": {"answer": 42}}
+        rv = self.client.get(f"/api/tasks/{task_failure.id}", headers=self.auth_user)
+        assert rv.status_code == 200
+        assert rv.json == {
+            "state": "FAILURE",
+            "info": {"exc_type": "ValueError", "exc_message": "boom"},
+        }
+        rv = self.client.get(f"/api/tasks/{task_id_revoked}", headers=self.auth_user)
+        assert rv.status_code == 200
+        assert rv.json["state"] == "REVOKED"
+        assert rv.json["info"]["exc_type"] == "TaskRevokedError"
+
+
+class TestTaskMetaCache(unittest.TestCase):
+    def test_task_meta_cache(self):
+        now = [0.0]
+        cache = TLRUCache(maxsize=16, ttu=tasks._task_meta_ttu, timer=lambda: now[0])
+        metas = {
+            TASK_ID: {"status": "PENDING", "result": None},
+            TASK_ID_2: {"status": "SUCCESS", "result": 42},
+        }
+        with patch.object(tasks, "_task_meta_cache", cache), patch.object(
+            tasks,
+            "_fetch_task_metas",
+            side_effect=lambda task_ids: {i: metas[i] for i in task_ids},
+        ) as mock_fetch:
+            assert tasks.get_task_metas([TASK_ID, TASK_ID_2]) == metas
+            mock_fetch.assert_called_once_with([TASK_ID, TASK_ID_2])
+            # second poll within the TTL is served from the cache
+            assert tasks.get_task_metas([TASK_ID, TASK_ID_2]) == metas
+            assert mock_fetch.call_count == 1
+            # the unready task expires first, the ready one is kept longer
+            now[0] = tasks.TASK_META_TTL_UNREADY + 0.1
+            assert tasks.get_task_metas([TASK_ID, TASK_ID_2]) == metas
+            assert mock_fetch.call_count == 2
+            mock_fetch.assert_called_with([TASK_ID])
+            now[0] = tasks.TASK_META_TTL_READY + 0.1
+            tasks.get_task_metas([TASK_ID_2])
+            assert mock_fetch.call_count == 3
+            mock_fetch.assert_called_with([TASK_ID_2])
@@ -19,20 +19,27 @@
 
 """Tests for the `gramps_webapi.api` module."""
 
+import hashlib
 import unittest
+from datetime import timedelta
 from unittest.mock import patch
 
+from flask_jwt_extended import JWTManager, create_access_token, decode_token
 from gramps.cli.clidbman import CLIDbManager
 from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import make_database
 from gramps.gen.dbstate import DbState
 from gramps.gen.lib import Person, Surname
 
 from gramps_webapi.app import create_app
 from gramps_webapi.auth.const import ROLE_GUEST, ROLE_OWNER
+from gramps_webapi.auth.passwords import hash_password
 from gramps_webapi.const import ENV_CONFIG_FILE, TEST_AUTH_CONFIG
 
+TEST_TREE_NAME = "Test Web API"
 
-def _add_person(gender, first_name, surname, trans, db, private=False):
+
+def _make_person(gender, first_name, surname, private=False):
     person = Person()
     person.gender = gender
     _name = person.primary_name
@@ -43,61 +50,71 @@ def _add_person(gender, first_name, surname, trans, db, private=False):
     person.gramps_id = "person001"
     if private:
         person.private = True
-    db.add_person(person, trans)
+    return person
+
+
+def setUpModule():
+    """Test module setup."""
+    global TEST_APP, TEST_DBMAN
+
+    TEST_DBMAN = CLIDbManager(DbState())
+    path, _name = TEST_DBMAN.create_new_db_cli(TEST_TREE_NAME, dbid="sqlite")
+    db = make_database("sqlite")
+    db.load(path)
+    people = [
+        _make_person(Person.MALE, "John", "Allen"),
+        _make_person(Person.FEMALE, "Jane", "Secret", private=True),
+    ]
+    # batch transaction: no undo history or signals per object
+    with DbTxn("Add test objects", db, batch=True) as trans:
+        for person in people:
+            db.add_person(person, trans)
+    db.close()
+    with patch.dict("os.environ", {ENV_CONFIG_FILE: TEST_AUTH_CONFIG}):
+        TEST_APP = create_app(config={"TESTING": True, "RATELIMIT_ENABLED": False})
+    sqlauth = TEST_APP.config["AUTH_PROVIDER"]
+    sqlauth.create_table()
+    pwhash = hash_password("123")
+    sqlauth.add_user_with_hash(name="user", pwhash=pwhash, role=ROLE_GUEST)
+    sqlauth.add_user_with_hash(name="admin", pwhash=pwhash, role=ROLE_OWNER)
+
+
+def tearDownModule():
+    """Test module tear down."""
+    TEST_DBMAN.remove_database(TEST_TREE_NAME)
 
 
 class TestPerson(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        cls.name = "Test Web API"
-        cls.dbman = CLIDbManager(DbState())
-        _, _name = cls.dbman.create_new_db_cli(cls.name, dbid="sqlite")
-        with patch.dict("os.environ", {ENV_CONFIG_FILE: TEST_AUTH_CONFIG}):
-            cls.app = create_app(config={"TESTING": True, "RATELIMIT_ENABLED": False})
+        cls.app = TEST_APP
         cls.client = cls.app.test_client()
-        sqlauth = cls.app.config["AUTH_PROVIDER"]
-        sqlauth.create_table()
-        sqlauth.add_user(name="user", password="123", role=ROLE_GUEST)
-        sqlauth.add_user(name="admin", password="123", role=ROLE_OWNER)
-        dbstate = cls.app.config["DB_MANAGER"].get_db(force_unlock=True)
-        with DbTxn("Add test objects", dbstate.db) as trans:
-            _add_person(Person.MALE, "John", "Allen", trans, dbstate.db)
-            _add_person(
-                Person.FEMALE, "Jane", "Secret", trans, dbstate.db, private=True
-            )
-        dbstate.db.close()
-
-    @classmethod
-    def tearDownClass(cls):
-        cls.dbman.remove_database(cls.name)
+        rv = cls.client.post(
+            "/api/token/", json={"username": "user", "password": "123"}
+        )
+        cls.token_user = rv.json["access_token"]
+        cls.refresh_token_user = rv.json["refresh_token"]
+        rv = cls.client.post(
+            "/api/token/", json={"username": "admin", "password": "123"}
+        )
+        cls.token_admin = rv.json["access_token"]
+        cls.auth_user = {"Authorization": "Bearer {}".format(cls.token_user)}
+        cls.auth_admin = {"Authorization": "Bearer {}".format(cls.token_admin)}
 
     def test_person_endpoint(self):
         rv = self.client.get("/api/people/")
         # no authorization header!
         assert rv.status_code == 401
-        # fetch a token and try again
-        rv = self.client.post(
-            "/api/token/", json={"username": "user", "password": "123"}
-        )
-        token = rv.json["access_token"]
-        rv = self.client.get(
-            "/api/people/",
-            headers={"Authorization": "Bearer {}".format(token)},
-        )
+        # try again with a token
+        rv = self.client.get("/api/people/", headers=self.auth_user)
         assert rv.status_code == 200
         it = rv.json[0]
         rv = self.client.get("/api/people/" + it["handle"] + "?profile=all")
         # no authorization header!
         assert rv.status_code == 401
-        # fetch a token and try again
-        rv = self.client.post(
-            "/api/token/", json={"username": "user", "password": "123"}
-        )
-        assert rv.status_code == 200
-        token = rv.json["access_token"]
+        # try again with a token
         rv = self.client.get(
-            "/api/people/" + it["handle"] + "?profile=all",
-            headers={"Authorization": "Bearer {}".format(token)},
+            "/api/people/" + it["handle"] + "?profile=all", headers=self.auth_user
         )
         assert rv.status_code == 200
         assert len(rv.json["handle"]) > 20
@@ -111,24 +128,9 @@ class TestPerson(unittest.TestCase):
         assert rv.json["death_ref_index"] == -1
 
     def test_person_endpoint_privacy(self):
-        rv = self.client.post(
-            "/api/token/", json={"username": "user", "password": "123"}
-        )
-        assert rv.status_code == 200
-        token_user = rv.json["access_token"]
-        rv = self.client.post(
-            "/api/token/", json={"username": "admin", "password": "123"}
-        )
-        token_admin = rv.json["access_token"]
-        rv = self.client.get(
-            "/api/people/",
-            headers={"Authorization": "Bearer {}".format(token_user)},
-        )
+        rv = self.client.get("/api/people/", headers=self.auth_user)
         assert len(rv.json) == 1
-        rv = self.client.get(
-            "/api/people/",
-            headers={"Authorization": "Bearer {}".format(token_admin)},
-        )
+        rv = self.client.get("/api/people/", headers=self.auth_admin)
         assert len(rv.json) == 2
 
     def test_token_endpoint(self):
@@ -156,24 +158,64 @@ class TestPerson(unittest.TestCase):
         rv = self.client.post("/api/token/refresh/", json={})
         # no authorization header!
         assert rv.status_code == 401
-        # fetch a token and try again
-        rv = self.client.post(
-            "/api/token/", json={"username": "user", "password": "123"}
-        )
-        assert rv.status_code == 200
-        refresh_token = rv.json["refresh_token"]
-        access_token = rv.json["access_token"]
         # incorrectly send access token instead of refresh token!
-        rv = self.client.post(
-            "/api/token/refresh/",
-            headers={"Authorization": "Bearer {}".format(access_token)},
-        )
+        rv = self.client.post("/api/token/refresh/", headers=self.auth_user)
         assert rv.status_code == 422
         rv = self.client.post(
             "/api/token/refresh/",
-            headers={"Authorization": "Bearer {}".format(refresh_token)},
+            headers={"Authorization": "Bearer {}".format(self.refresh_token_user)},
         )
         assert rv.status_code == 200
         assert "refresh_token" not in rv.json
         assert "access_token" in rv.json
         assert rv.json["access_token"] != 1
+
+    def test_cached_token(self):
+        rv = self.client.post(
+            "/api/token/", json={"username": "user", "password": "123"}
+        )
+        headers = {"Authorization": "Bearer {}".format(rv.json["access_token"])}
+        with patch.object(
+            JWTManager,
+            "_decode_jwt_from_config",
+            autospec=True,
+            side_effect=JWTManager._decode_jwt_from_config,
+        ) as mock_decode:
+            for _ in range(2):
+                rv = self.client.get("/api/people/", headers=headers)
+                assert rv.status_code == 200
+        # the second request is served from the decode cache
+        assert mock_decode.call_count == 1
+        # a tampered token must still be rejected
+        header, payload, signature = self.token_user.split(".")
+        tampered = ".".join([header, payload, signature[::-1]])
+        rv = self.client.get(
+            "/api/people/",
+            headers={"Authorization": "Bearer {}".format(tampered)},
+        )
+        assert rv.status_code == 422
+
+    def test_cached_token_expired(self):
+        with self.app.app_context():
+            token = create_access_token(
+                identity="user",
+                additional_claims={"permissions": []},
+                expires_delta=timedelta(seconds=-1),
+            )
+            claims = decode_token(token, allow_expired=True)
+            # seed the decode cache with the claims of the expired token
+            cache = self.app.extensions["flask-jwt-extended"]._get_decode_cache()
+            key = hashlib.sha256(token.encode()).hexdigest()
+            cache[key] = (claims, claims["exp"])
+        headers = {"Authorization": "Bearer {}".format(token)}
+        with patch.object(
+            JWTManager,
+            "_decode_jwt_from_config",
+            autospec=True,
+            side_effect=JWTManager._decode_jwt_from_config,
+        ) as mock_decode:
+            # the cached claims have expired, so the token is verified again
+            rv = self.client.get("/api/people/", headers=headers)
+            assert rv.status_code == 401
+        assert mock_decode.call_count == 1
+        assert key not in cache
@@ -26,6 +26,7 @@ from gramps_webapi.auth.const import (
     ROLE_OWNER,
     ROLE_GUEST,
 )
+from gramps_webapi.auth.passwords import hash_password
 
 
 class TestSQLAuth(unittest.TestCase):
@@ -47,6 +48,18 @@ class TestSQLAuth(unittest.TestCase):
             self.assertEqual(user.name, "test_user")
             self.assertEqual(user.fullname, "Test User")
 
+    def test_add_user_with_hash(self):
+        sqlauth = SQLAuth("sqlite://", logging=False)
+        sqlauth.create_table()
+        pwhash = hash_password("123")
+        with self.assertRaises(ValueError):
+            sqlauth.add_user_with_hash("", pwhash)  # empty username
+        sqlauth.add_user_with_hash("test_user", pwhash)
+        sqlauth.add_user_with_hash("test_user_2", pwhash)
+        self.assertTrue(sqlauth.authorized("test_user", "123"))
+        self.assertTrue(sqlauth.authorized("test_user_2", "123"))
+        self.assertEqual(sqlauth.get_pwhash("test_user"), pwhash)
+
     def test_authorized(self):
         sqlauth = SQLAuth("sqlite://", logging=False)
         sqlauth.create_table()